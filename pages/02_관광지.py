@@ -1,6 +1,6 @@
+from pathlib import Path
 import streamlit as st
 import folium
-from streamlit_folium import st_folium
 import pandas as pd
 
 st.set_page_config(page_title="Seoul Top10 Map", layout="wide")
@@ -29,33 +29,44 @@ st.sidebar.header("🗺️ 지도 설정")
 map_style = st.sidebar.selectbox("지도 스타일 선택", ["OpenStreetMap", "Stamen Toner", "Stamen Terrain"])
 zoom = st.sidebar.slider("줌 레벨", 8, 16, 12)
 
-# 지도 생성
-m = folium.Map(location=[37.56, 126.98], zoom_start=zoom, tiles=map_style)
+# 지도 생성 (스타일/줌이 같으면 렌더링된 HTML을 재사용)
+@st.cache_data(show_spinner=False)
+def build_map(style: str, zoom: int) -> str:
+    m = folium.Map(location=[37.56, 126.98], zoom_start=zoom, tiles=style)
 
-for _, row in df.iterrows():
-    folium.Marker(
-        [row["lat"], row["lon"]],
-        popup=f"<b>{row['name']}</b><br>{row['desc']}",
-        tooltip=row["name"]
-    ).add_to(m)
+    # 마커는 FeatureGroup에 모아서 지도에 한 번에 추가
+    fg = folium.FeatureGroup(name="관광지")
+    for name, lat, lon, desc in df.itertuples(index=False, name=None):
+        folium.Marker(
+            [lat, lon],
+            popup=f"<b>{name}</b><br>{desc}",
+            tooltip=name
+        ).add_to(fg)
+    fg.add_to(m)
+    return m.get_root().render()
 
-# 지도 표시
-st_folium(m, width=900, height=600)
+# 지도 표시 (클릭 등 상호작용 값은 쓰지 않으므로 st_folium 대신 정적 HTML로 표시)
+# 직접 만든 folium HTML만 넣으므로 st.iframe에 HTML 문자열로 전달해도 안전함
+st.iframe(build_map(map_style, zoom), width=900, height=600)
 
 # 장소 리스트 출력
 st.subheader("📍 관광지 목록")
-for _, row in df.iterrows():
-    st.markdown(f"**{row['name']}** — {row['desc']}")
+st.markdown("\n\n".join(
+    f"**{name}** — {desc}" for name, _, _, desc in df.itertuples(index=False, name=None)
+))
 
 # requirements.txt 내용
 st.sidebar.download_button(
     "📦 requirements.txt 다운로드",
-    data="streamlit\nfolium\nstreamlit-folium\npandas\n",
+    data="streamlit>=1.65\nfolium\npandas\n",
     file_name="requirements.txt",
     mime="text/plain"
 )
 
-# 코드 보기
+# 코드 보기 (파일이 수정됐을 때만 다시 읽음)
+@st.cache_data(show_spinner=False)
+def source_code(mtime: float) -> str:
+    return Path(__file__).read_text(encoding="utf-8")
+
 st.subheader("💻 앱 코드 (복사해서 사용 가능)")
-with open(__file__, "r", encoding="utf-8") as f:
-    st.code(f.read(), language="python")
+st.code(source_code(Path(__file__).stat().st_mtime), language="python")
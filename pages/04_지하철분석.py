@@ -1,8 +1,10 @@
 # pages/top10_oct2025.py
+import codecs
+import datetime
 import streamlit as st
 import pandas as pd
 import numpy as np
-import plotly.express as px
+import plotly.graph_objects as go
 
 st.set_page_config(page_title="2025-10 일별 역별 이용자 Top10", layout="wide")
 
@@ -15,39 +17,118 @@ st.markdown(
     """
 )
 
+ENCODINGS = ["utf-8-sig", "cp949", "euc-kr", "latin1"]
+# 실제로 쓰는 열 (그 외 등록일자 등은 읽지 않음)
+USED_COLUMNS = ("사용일자", "노선명", "역명", "승차총승객수", "하차총승객수")
+LOAD_ERROR = "gusalgu.csv 파일을 루트에 두고 다시 시도하세요. (지원 인코딩: utf-8-sig, cp949, euc-kr, latin1)"
+
+def sniff_encoding(path, encodings=ENCODINGS, probe_size=65536):
+    # 파일 앞부분(64KB)만 디코딩해보고 인코딩을 정함 → 전체 파일은 한 번만 파싱
+    with open(path, "rb") as f:
+        head = f.read(probe_size)
+    for enc in encodings:
+        try:
+            # final=False: 64KB 경계에서 잘린 멀티바이트 문자는 오류로 보지 않음
+            codecs.getincrementaldecoder(enc)().decode(head, final=False)
+            return enc
+        except UnicodeDecodeError:
+            continue
+    return None
+
+def read_csv_with(path, enc):
+    # 머리글만 먼저 읽어서 필요한 열만 골라 읽음 (머리글 앞뒤 공백은 무시하고 비교)
+    header = pd.read_csv(path, encoding=enc, nrows=0).columns
+    usecols = [c for c in header if c.strip() in USED_COLUMNS]
+    # 사용일자는 문자열로 바로 읽음 → 정수 파싱 후 다시 문자열로 바꾸는 과정 생략
+    dtype = {c: str for c in usecols if c.strip() == "사용일자"}
+    try:
+        return pd.read_csv(path, encoding=enc, engine="pyarrow", usecols=usecols, dtype=dtype)
+    except ImportError:
+        return pd.read_csv(path, encoding=enc, usecols=usecols, dtype=dtype)
+
 @st.cache_data(show_spinner=False)
 def load_data(path="gusalgu.csv"):
-    # 다양한 인코딩 시도(현업에서 CP949로 저장된 경우가 많음)
-    encodings = ["utf-8-sig", "cp949", "euc-kr", "latin1"]
-    for enc in encodings:
+    # 다양한 인코딩 지원(현업에서 CP949로 저장된 경우가 많음)
+    try:
+        enc = sniff_encoding(path)
+    except OSError:
+        raise FileNotFoundError(LOAD_ERROR)
+
+    # 앞부분으로 추정한 인코딩부터 읽고, 파일 뒤쪽에서 디코딩이 실패하면 나머지 인코딩을 차례로 시도
+    df = None
+    for candidate in [enc] + [e for e in ENCODINGS if e != enc]:
+        if candidate is None:
+            continue
         try:
-            df = pd.read_csv(path, encoding=enc)
-            df.columns = df.columns.str.strip()
-            # 날짜 컬럼 처리: 정수형 YYYYMMDD -> datetime
-            if "사용일자" in df.columns:
-                df["사용일자_str"] = df["사용일자"].astype(str)
-                df["date"] = pd.to_datetime(df["사용일자_str"], format="%Y%m%d", errors="coerce")
-            else:
-                df["date"] = pd.NaT
-            # 합계 컬럼 추가
-            if {"승차총승객수", "하차총승객수"}.issubset(df.columns):
-                df["total"] = pd.to_numeric(df["승차총승객수"], errors="coerce").fillna(0) + \
-                              pd.to_numeric(df["하차총승객수"], errors="coerce").fillna(0)
-            else:
-                df["total"] = 0
-            return df
-        except Exception:
+            df = read_csv_with(path, candidate)
+            break
+        except (UnicodeDecodeError, ValueError):
             continue
-    raise FileNotFoundError("gusalgu.csv 파일을 루트에 두고 다시 시도하세요. (지원 인코딩: utf-8-sig, cp949, euc-kr, latin1)")
+    if df is None:
+        raise FileNotFoundError(LOAD_ERROR)
+
+    df.columns = df.columns.str.strip()
+    # 노선명/역명은 반복되는 문자열이므로 category로 변환 (필터·groupby가 정수 비교로 동작)
+    for col in ("노선명", "역명"):
+        if col in df.columns:
+            df[col] = df[col].astype("category")
+    # 날짜 컬럼 처리: 정수형 YYYYMMDD -> datetime (cache=True로 같은 날짜 문자열은 한 번만 파싱)
+    if "사용일자" in df.columns:
+        df["사용일자_str"] = df["사용일자"].astype(str)
+        df["date"] = pd.to_datetime(df["사용일자_str"], format="%Y%m%d", errors="coerce", cache=True)
+    else:
+        df["date"] = pd.NaT
+    # 필터용 정수 날짜 키 (YYYYMMDD, 날짜 없음 = 0) — datetime.date 객체 비교 대신 int 비교
+    df["date_key"] = (
+        df["date"].dt.year * 10000 + df["date"].dt.month * 100 + df["date"].dt.day
+    ).fillna(0).astype("int32")
+    # 합계 컬럼 추가
+    if {"승차총승객수", "하차총승객수"}.issubset(df.columns):
+        df["total"] = pd.to_numeric(df["승차총승객수"], errors="coerce").fillna(0) + \
+                      pd.to_numeric(df["하차총승객수"], errors="coerce").fillna(0)
+    else:
+        df["total"] = 0
+    return df
+
+# 2025-10 날짜 목록 / 날짜별 노선 목록 / (날짜, 노선)별 역 합계를 한 번만 계산해두고
+# 위젯이 바뀔 때는 dict 조회만 하도록 함
+# 결과는 읽기만 하므로 cache_resource로 공유 → 리런마다 dict 전체를 복사(unpickle)하지 않음
+@st.cache_resource(show_spinner=False)
+def build_oct_index(path="gusalgu.csv"):
+    df = load_data(path)
+    df_oct = df.loc[df["date_key"] // 100 == 202510]
+
+    # (날짜, 노선, 역명)별 total 합계를 groupby 한 번으로 계산 (보통 데이터는 이미 일별/역별이지만 sum이 안전)
+    df_oct = df_oct.loc[df_oct["노선명"].notna()]
+    sums = df_oct.groupby(["date_key", "노선명", "역명"], observed=True, dropna=False)["total"].sum()
+
+    # (날짜, 노선) 순으로 묶고, 각 묶음 안에서는 큰 값 순으로 정렬
+    dates = sums.index.get_level_values("date_key").to_numpy()
+    lines = sums.index.get_level_values("노선명")
+    line_codes = lines.codes if hasattr(lines, "codes") else pd.factorize(lines, sort=True)[0]
+    order = np.lexsort((-sums.to_numpy(), line_codes, dates))
+    sums = sums.iloc[order]
+    dates, line_codes, lines = dates[order], np.asarray(line_codes)[order], lines[order]
+    by_station = pd.Series(sums.to_numpy(), index=sums.index.get_level_values("역명"), name="total")
+
+    # 묶음 경계 위치에서 잘라서 dict로 (묶음마다 groupby를 다시 하지 않음)
+    starts = np.flatnonzero(np.r_[True, (dates[1:] != dates[:-1]) | (line_codes[1:] != line_codes[:-1])])
+    ends = np.r_[starts[1:], len(sums)]
+    top_by = {}
+    lines_by_date = {}
+    for start, end in zip(starts, ends):
+        d, line = int(dates[start]), lines[start]
+        top_by[(d, line)] = by_station.iloc[start:end]
+        lines_by_date.setdefault(d, []).append(line)
+    available_dates = sorted(lines_by_date)
+    return available_dates, lines_by_date, top_by
+
+def key_to_date(key):
+    return datetime.date(key // 10000, key // 100 % 100, key % 100)
 
 # 로드
 with st.spinner("데이터 로드 중..."):
-    df = load_data("gusalgu.csv")
-
-# --- 필터: 2025-10의 날짜 목록 생성 ---
-oct_mask = (df["date"].notna()) & (df["date"].dt.year == 2025) & (df["date"].dt.month == 10)
-available_dates = df.loc[oct_mask, "date"].dropna().dt.date.unique()
-available_dates = np.sort(available_dates)
+    available_dates, lines_by_date, top_by = build_oct_index("gusalgu.csv")
 
 if len(available_dates) == 0:
     st.error("데이터에서 2025년 10월의 날짜를 찾을 수 없습니다. CSV가 올바른지 확인하세요.")
@@ -55,26 +136,20 @@ if len(available_dates) == 0:
 
 # 사이드바 컨트롤
 st.sidebar.header("필터")
-selected_date = st.sidebar.selectbox("날짜 선택 (2025년 10월)", available_dates, index=0)
+selected_key = st.sidebar.selectbox("날짜 선택 (2025년 10월)", available_dates, index=0, format_func=lambda k: key_to_date(k).isoformat())
 # 노선 목록 (해당 날짜에 존재하는 노선만)
-lines_on_date = df.loc[df["date"].dt.date == selected_date, "노선명"].dropna().unique()
-lines_on_date = np.sort(lines_on_date)
-selected_line = st.sidebar.selectbox("호선 선택", lines_on_date)
+selected_line = st.sidebar.selectbox("호선 선택", lines_by_date[selected_key])
 
 top_n = st.sidebar.number_input("상위 N개 (막대그래프)", min_value=1, max_value=50, value=10, step=1)
 
 # 필터 적용
-mask = (df["date"].dt.date == selected_date) & (df["노선명"] == selected_line)
-df_f = df.loc[mask].copy()
+grouped = top_by.get((selected_key, selected_line))
 
-if df_f.shape[0] == 0:
+if grouped is None or grouped.empty:
     st.warning("선택한 날짜와 호선에 해당하는 데이터가 없습니다.")
     st.stop()
 
-# 그룹화: 역명별 total 합계 (하지만 보통 데이터는 이미 일별/역별이므로 sum이 안전)
-grouped = df_f.groupby("역명", dropna=False, as_index=False)["total"].sum()
-grouped = grouped.sort_values("total", ascending=False)
-topk = grouped.head(int(top_n)).copy()
+topk = grouped.head(int(top_n)).reset_index()
 
 # 색 만들기: 1등 빨강, 나머지 파란색 그라데이션 (연한 -> 진한)
 def make_colors(n):
@@ -90,33 +165,55 @@ def make_colors(n):
     # linear interpolation between light blue and dark blue in hex
     start_rgb = np.array([210, 230, 250]) / 255.0  # 연한파랑
     end_rgb = np.array([10, 60, 130]) / 255.0      # 진한파랑
-    for i in range(rest):
-        t = i / max(1, rest - 1)  # 0..1
-        rgb = (1 - t) * start_rgb + t * end_rgb
-        hexc = '#' + ''.join(f'{int(x*255):02x}' for x in rgb)
-        colors.append(hexc)
+    t = (np.arange(rest) / max(1, rest - 1))[:, None]  # 0..1, 한 번에 계산
+    rgb = (((1 - t) * start_rgb + t * end_rgb) * 255).astype(np.uint8)
+    colors.extend('#' + c.tobytes().hex() for c in rgb)
     return colors
 
-colors = make_colors(len(topk))
-
-# Plotly 막대그래프 (가로 막대가 보기 좋음)
-fig = px.bar(
-    topk[::-1],  # 막대가 큰 값이 위로 오도록 역순
-    x="total",
-    y="역명",
-    orientation="h",
-    text="total",
-    labels={"total": "승차+하차 합계", "역명": "역명"},
-    title=f"{selected_date} — {selected_line} 상위 {len(topk)} 역 (승차+하차 합계)"
-)
+# 막대가 너무 많으면 브라우저 렌더링이 느려지므로 BAR_CAP개까지만 개별 막대로 그리고,
+# 상위 N개 중 나머지는 '기타' 막대 하나로 합침 (표에는 상위 N개 모두 표시)
+BAR_CAP = 20
+OTHERS_COLOR = "#b0b0b0"
 
-# 색 지정
-fig.update_traces(marker_color=colors[::-1], textposition="outside", marker_line_width=0)
-fig.update_layout(yaxis=dict(autorange="reversed"), 
-                  margin=dict(l=200, r=30, t=80, b=40),
-                  hovermode="y")
-
-st.plotly_chart(fig, use_container_width=True)
+# 그림은 (날짜, 호선, N)이 같으면 다시 만들지 않음
+@st.cache_data(show_spinner=False)
+def build_fig(date_key, line, top_n):
+    _, _, top_by = build_oct_index("gusalgu.csv")
+    topk = top_by[(date_key, line)].head(top_n).reset_index()
+
+    if len(topk) > BAR_CAP:
+        head = topk.head(BAR_CAP)
+        chart_df = pd.DataFrame({
+            "역명": head["역명"].astype(str).tolist() + [f"기타 ({len(topk) - BAR_CAP}개 역)"],
+            "total": head["total"].tolist() + [topk["total"].iloc[BAR_CAP:].sum()],
+        })
+        colors = make_colors(BAR_CAP) + [OTHERS_COLOR]
+    else:
+        chart_df = topk
+        colors = make_colors(len(topk))
+
+    # Plotly 막대그래프 (가로 막대가 보기 좋음) — px 대신 go.Bar 하나로 직접 구성
+    chart_df = chart_df[::-1]  # 막대가 큰 값이 위로 오도록 역순
+    fig = go.Figure(go.Bar(
+        x=chart_df["total"],
+        y=chart_df["역명"].astype(str),
+        orientation="h",
+        text=chart_df["total"],
+        textposition="outside",
+        marker=dict(color=colors[::-1], line_width=0),
+        hovertemplate="승차+하차 합계=%{x}<br>역명=%{y}<extra></extra>",
+    ))
+    fig.update_layout(title=f"{key_to_date(date_key)} — {line} 상위 {len(topk)} 역 (승차+하차 합계)",
+                      xaxis_title="승차+하차 합계",
+                      yaxis=dict(title="역명", autorange="reversed"),
+                      margin=dict(l=200, r=30, t=80, b=40),
+                      hovermode="y")
+    return fig
+
+fig = build_fig(selected_key, selected_line, int(top_n))
+# 확대/이동이 필요 없는 막대그래프이므로 모드바·스크롤 줌은 끔
+st.plotly_chart(fig, use_container_width=True,
+                config={"responsive": True, "scrollZoom": False, "displayModeBar": False})
 
 # 표로도 보여주기
 with st.expander("Top 결과표 보기"):
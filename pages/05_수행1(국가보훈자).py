@@ -1,6 +1,11 @@
+import codecs
+import hashlib
+import os
+import re
 import streamlit as st
 import pandas as pd
-import plotly.express as px
+import numpy as np
+import plotly.graph_objects as go
 
 st.set_page_config(page_title="독립유공자 - 생월 & 사망월 목록", layout="wide")
 
@@ -21,97 +26,277 @@ st.markdown(
 # -----------------------
 # 📌 CSV 로드 (인코딩 자동 감지)
 # -----------------------
-@st.cache_data
-def load_data():
-    encodings = ["utf-8-sig", "euc-kr", "cp949", "utf-8"]
+DATA_PATH = "The.korean.goat.csv"
+# 분석(생년월일/사망년월일)과 목록 표시에 실제로 쓰는 열
+DATA_COLUMNS = ["관리번호", "성명", "생년월일", "사망년월일", "성별", "운동계열", "포상년도", "훈격(소분류)"]
+
+ENCODINGS = ["utf-8-sig", "euc-kr", "cp949", "utf-8"]
+
+def sniff_encoding(path, probe_size=4096):
+    # 앞부분 4KB만 보고 인코딩을 정함 (파일을 열 수 없으면 None)
+    # - UTF-8 BOM → utf-8-sig
+    # - UTF-8로 디코딩되면 utf-8, 아니면 cp949 (euc-kr의 상위 호환)
+    try:
+        with open(path, "rb") as f:
+            head = f.read(probe_size)
+    except OSError:
+        return None
+    if head.startswith(codecs.BOM_UTF8):
+        return "utf-8-sig"
+    try:
+        # final=False: 4KB 경계에서 잘린 멀티바이트 문자는 오류로 보지 않음
+        codecs.getincrementaldecoder("utf-8")().decode(head, final=False)
+        return "utf-8"
+    except UnicodeDecodeError:
+        return "cp949"
+
+def load_data(full=False):
+    # 추정한 인코딩으로 한 번에 읽고, 실패할 때만 기존 인코딩 목록을 차례로 시도
+    detected = sniff_encoding(DATA_PATH)
+    encodings = ([detected] if detected else []) + [e for e in ENCODINGS if e != detected]
 
     for enc in encodings:
         try:
-            return pd.read_csv("The.korean.goat.csv", dtype=str, encoding=enc)
+            # 머리글만 먼저 읽어서 필요한 열만 골라 읽음 (full=True면 전체 열)
+            usecols = None
+            if not full:
+                header = pd.read_csv(DATA_PATH, nrows=0, encoding=enc).columns
+                usecols = [c for c in header if c in DATA_COLUMNS]
+            # pyarrow 엔진 + Arrow 문자열: 파싱이 빠르고 문자열 메모리도 작음
+            try:
+                return pd.read_csv(DATA_PATH, dtype=str, encoding=enc, usecols=usecols,
+                                   engine="pyarrow", dtype_backend="pyarrow")
+            except ImportError:
+                return pd.read_csv(DATA_PATH, dtype=str, encoding=enc, usecols=usecols)
         except:
             pass
 
     st.error("❌ CSV 파일 인코딩을 읽을 수 없습니다. 인코딩을 UTF-8 또는 CP949로 저장해 주세요.")
     return None
 
-
-df = load_data()
-if df is None:
-    st.stop()
-
 # -----------------------
 # 📌 날짜 컬럼 정제
 # -----------------------
+# 연도(4자리 YYYY 또는 2자리 YY) 바로 다음의 두 자리를 월로 잡는 패턴
+# (구분자 - . / 공백 년월일 등은 있어도 없어도 됨: 1884-03-05, 18840305, 840305, 1884년 03월 05일)
+MONTH_RE = re.compile(r"^\D*(?:\d{4}|\d{2})\D*(\d{2})\D*\d{2}\D*$")
+DIGIT_RE = re.compile(r"\d")
+SEPARATOR_RE = re.compile(r"\D+")
+LONG_YEAR_RE = re.compile(r"\d{4}-")
+VALID_MONTHS = [f"{m:02d}" for m in range(1, 13)]
+MONTHS = tuple(range(1, 13))  # 월 축(1~12): 리런마다 새로 만들지 않는 모듈 상수
+MONTH_DTYPE = pd.CategoricalDtype(list(MONTHS))
+MONTH_COLUMNS = ("birth_month", "death_month")
+
 def extract_month(series):
-    return (
-        series.astype(str)
-        .str.replace(r"[^0-9]", "", regex=True)
-        .str.zfill(8)
-        .str[4:6]
-    )
+    # 미리 컴파일한 정규식 하나로 월을 바로 추출 (행 단위 apply 없음, 중간 문자열도 만들지 않음)
+    # - 패턴에 맞지 않지만 숫자가 있는 값(예: 한 자리 월/일 "1884.3.5"): 구분자를 '-'로 통일한 뒤
+    #   연도 자릿수별로 형식을 지정해서 pd.to_datetime 처리 (dateutil 추측 파싱 없음)
+    # - 숫자가 없는 값(미상, 비공개 등): 월 없음
+    # 같은 날짜 문자열이 많으므로 고유값에 대해서만 계산하고 코드로 다시 펼침
+    codes, uniques = pd.factorize(series.astype("string"))
+    raw = pd.Series(uniques)
+    month = raw.str.extract(MONTH_RE, expand=False)
+    residual = raw[month.isna()]
+    residual = residual[residual.str.contains(DIGIT_RE, na=False)]
+    if len(residual):
+        parts = residual.str.replace(SEPARATOR_RE, "-", regex=True).str.strip("-")
+        long_year = parts.str.match(LONG_YEAR_RE)
+        # cache=True: 같은 날짜 문자열은 한 번만 파싱
+        parsed = pd.concat([
+            pd.to_datetime(parts[long_year], format="%Y-%m-%d", errors="coerce", cache=True),
+            pd.to_datetime(parts[~long_year], format="%y-%m-%d", errors="coerce", cache=True),
+        ])
+        month.loc[parsed.index] = parsed.dt.strftime("%m")
+    month = month.where(month.isin(VALID_MONTHS))  # 월 미상(00) 등 1~12월이 아닌 값
+    # 1~12월 고정 범주(Categorical)로 변환: 범주 코드 0~11, 월 없음 = -1
+    # factorize는 결측값을 -1로 표시하므로 끝에 붙인 -1 자리로 결측 → 월 없음으로 매핑
+    month_codes = np.append(pd.to_numeric(month).fillna(0).to_numpy(np.int8) - 1, np.int8(-1))
+    return pd.Series(pd.Categorical.from_codes(month_codes[codes], dtype=MONTH_DTYPE), index=series.index)
+
+def prepare(df):
+    # 새로 필요한 월 열 두 개만 만들어서 반환 (DataFrame 전체를 복사하지 않음)
+    return extract_month(df["생년월일"]), extract_month(df["사망년월일"])
+
+# 고유값 비율이 이보다 낮은 문자열 열은 category로 저장 (성별, 운동계열, 훈격 등)
+CATEGORY_RATIO = 0.5
+RAW_DATE_COLUMNS = ("생년월일", "사망년월일")
+
+def downcast_strings(df):
+    # 반복 값이 많은 열은 정수 코드 + 고유값 사전으로 바꿔 캐시에 남는 메모리를 줄임
+    # (원본 날짜 문자열은 목록에 그대로 보여주므로 제외)
+    for col in df.columns:
+        if col in RAW_DATE_COLUMNS or isinstance(df[col].dtype, pd.CategoricalDtype):
+            continue
+        if df[col].nunique() < len(df) * CATEGORY_RATIO:
+            df[col] = df[col].astype("category")
+    return df
+
+# -----------------------
+# 📌 Parquet 스냅샷 (정제까지 끝난 결과를 CSV 옆에 저장)
+# -----------------------
+# 한 번 CSV를 읽고 월 계산까지 마친 결과를 Parquet로 남겨두고, 이후 서버 재시작 등으로
+# 캐시가 비었을 때는 CSV 파싱·인코딩 확인·월 계산 없이 Parquet만 읽음
+# 스냅샷을 만드는 코드(extract_month, downcast_strings 등)를 바꾸면 이 값을 올릴 것
+SNAPSHOT_VERSION = 1
+
+def snapshot_key(full):
+    # 코드 버전 + 읽는 열 구성 → 파일 이름에 넣어서 구성이 다르면 다른 파일을 씀
+    columns = None if full else DATA_COLUMNS
+    return hashlib.sha1(repr((SNAPSHOT_VERSION, columns)).encode("utf-8")).hexdigest()[:10]
+
+def snapshot_path(full):
+    return f"{os.path.splitext(DATA_PATH)[0]}.{snapshot_key(full)}.parquet"
+
+def read_snapshot(csv_mtime, csv_size, full):
+    try:
+        df = pd.read_parquet(snapshot_path(full))
+    except (OSError, ImportError, ValueError):
+        return None
+    # 파일 이름이 같아도, 스냅샷을 만든 CSV(수정시각·크기)와 코드 버전이 모두 같을 때만 사용
+    expected = {"key": snapshot_key(full), "mtime": csv_mtime, "size": csv_size}
+    if df.attrs.get("snapshot") != expected:
+        return None
+    # Parquet에는 정수 범주가 실수로 저장되므로 1~12월 범주로 되돌림
+    for col in MONTH_COLUMNS:
+        if col in df.columns:
+            df[col] = df[col].astype(MONTH_DTYPE)
+    return df
+
+def write_snapshot(df, csv_mtime, csv_size, full):
+    # 저장에 실패해도(읽기 전용 폴더, pyarrow 없음 등) 앱 동작에는 영향 없음
+    df.attrs["snapshot"] = {"key": snapshot_key(full), "mtime": csv_mtime, "size": csv_size}
+    try:
+        df.to_parquet(snapshot_path(full), index=False)
+    except (OSError, ImportError, ValueError, TypeError):
+        pass
 
-df["birth_month"] = extract_month(df["생년월일"])
-df["death_month"] = extract_month(df["사망년월일"])
+# 읽기 + 월 계산을 한 번에 캐시. 캐시 키는 파일 수정시각·크기(스칼라)라서
+# 리런마다 DataFrame 전체를 해싱하지 않고, 파일이 바뀌면 자동으로 다시 읽음
+# 불러온 DataFrame은 읽기만 하므로(필터는 iloc으로 새 객체 생성) cache_resource로 공유해서
+# 캐시 적중 시 DataFrame 복사본을 만들지 않음
+@st.cache_resource(show_spinner=False)
+def load_prepared(mtime, size, full=False):
+    df = read_snapshot(mtime, size, full)
+    if df is not None:
+        return df
+    df = load_data(full)
+    if df is None:
+        return None
+    df["birth_month"], df["death_month"] = prepare(df)
+    df = downcast_strings(df)
+    write_snapshot(df, mtime, size, full)
+    return df
 
-df["birth_month"] = df["birth_month"].replace("00", None)
-df["death_month"] = df["death_month"].replace("00", None)
+def file_signature(path):
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return 0.0, 0
+    return stat.st_mtime, stat.st_size
+
+
+full_load = st.sidebar.checkbox("전체 열 불러오기", value=False,
+                                help="기본은 분석·목록에 쓰는 열만 읽습니다. 원본의 모든 열을 보려면 체크하세요.")
+mtime, size = file_signature(DATA_PATH)
+df = load_prepared(mtime, size, full_load)
+if df is None:
+    st.stop()
 
 # ------------------------------------
 # 🎨 그래프 색상 (1등: 한국 느낌 = 남색)
 # ------------------------------------
 KOREA_COLOR = "#003478"  # 한국 태극기 청색 계열
-GRADIENT = px.colors.sequential.Blues[::-1][1:]  # 나머지 그라데이션
+GRADIENT_START = np.array([66, 146, 198])   # 중간 파랑 (1등 남색과 구분되도록)
+GRADIENT_END = np.array([198, 219, 239])    # 연한 파랑
+
+def make_month_colors(counts, top_color=KOREA_COLOR):
+    # 막대 색: 중간 → 연한 파랑 그라데이션을 한 번에 계산하고, 가장 많은 달(1등)만 한국 색으로
+    n = len(counts)
+    if n == 0:
+        return ()
+    t = np.linspace(0, 1, n)[:, None]
+    rgb = ((1 - t) * GRADIENT_START + t * GRADIENT_END).astype(int)
+    colors = [f"rgb({r},{g},{b})" for r, g, b in rgb]
+    colors[int(np.argmax(counts))] = top_color
+    return tuple(colors)
+
+# 월별 막대그래프: 월별 건수가 같으면 그림을 다시 만들지 않음
+# (월 선택과 무관하므로 selectbox를 바꿔도 캐시가 그대로 유지됨)
+@st.cache_data(show_spinner=False)
+def build_bar(counts, y_title):
+    # px.bar 대신 go.Bar 하나로 직접 구성 (Express의 DataFrame 변환 과정 생략)
+    fig = go.Figure(go.Bar(
+        x=MONTHS,
+        y=counts,
+        marker_color=make_month_colors(counts),
+        hovertemplate=f"월=%{{x}}<br>{y_title}=%{{y}}<extra></extra>",
+    ))
+
+    fig.update_layout(
+        title="",  # 제목 제거 → 옆에 뜨는 "인터랙티브?" 문구도 함께 제거됨
+        xaxis_title="월",
+        xaxis_dtick=1,
+        yaxis_title=y_title,
+    )
+    return fig
+
+# 월별 집계는 데이터가 바뀔 때만 다시 계산 (캐시 키는 파일 서명, DataFrame 자체는 해싱하지 않음)
+def month_hist(month_series):
+    # 월은 1~12 고정 범주이므로 해시 테이블 없이 범주 코드에 bincount 한 번으로 집계
+    codes = month_series.cat.codes.to_numpy()
+    return np.bincount(codes[codes >= 0], minlength=len(MONTHS))
+
+@st.cache_data(show_spinner=False)
+def month_counts(fingerprint, _df, col):
+    return tuple(month_hist(_df[col]).tolist())
+
+# 월 → 행 위치 배열: 데이터가 바뀔 때만 한 번 만들고, 월 선택 시에는 dict 조회 + iloc만 수행
+@st.cache_data(show_spinner=False)
+def month_positions(fingerprint, _df, col):
+    return {int(m): idx for m, idx in _df.groupby(col, observed=True, sort=True).indices.items()}
+
+data_fingerprint = (mtime, size, full_load)
 
 # ------------------------------------------------------
 # 📈 월별 출생자 그래프 (제목 옆의 ‘인터랙티브?’ 제거)
 # ------------------------------------------------------
-birth_counts = df["birth_month"].value_counts().sort_index()
-birth_fig = px.bar(
-    x=birth_counts.index,
-    y=birth_counts.values,
-)
-birth_fig.update_traces(marker_color=[KOREA_COLOR] + GRADIENT[:len(birth_counts)-1])
-
-birth_fig.update_layout(
-    title="",  # 제목 제거 → 옆에 뜨는 "인터랙티브?" 문구도 함께 제거됨
-    xaxis_title="월",
-    yaxis_title="출생자 수",
-)
+birth_fig = build_bar(month_counts(data_fingerprint, df, "birth_month"), "출생자 수")
 
 # ------------------------------------------------------
 # 📈 월별 사망자 그래프
 # ------------------------------------------------------
-death_counts = df["death_month"].value_counts().sort_index()
-death_fig = px.bar(
-    x=death_counts.index,
-    y=death_counts.values,
-)
-death_fig.update_traces(marker_color=[KOREA_COLOR] + GRADIENT[:len(death_counts)-1])
-
-death_fig.update_layout(
-    title="",
-    xaxis_title="월",
-    yaxis_title="사망자 수",
-)
+death_fig = build_bar(month_counts(data_fingerprint, df, "death_month"), "사망자 수")
 
 # -----------------------
 # 📌 월 선택 UI
 # -----------------------
 st.subheader("🔎 특정 월의 독립유공자 목록 보기")
 
-month_options = sorted(df["birth_month"].dropna().unique())
+birth_positions = month_positions(data_fingerprint, df, "birth_month")
+month_options = list(birth_positions)
 selected_month = st.selectbox("출생월 선택", month_options)
 
-filtered = df[df["birth_month"] == selected_month]
+filtered = df.iloc[birth_positions[selected_month]]
 
 st.write(f"### 📋 {selected_month}월 출생 독립유공자 목록")
-st.dataframe(filtered)
+
+# 화면에는 한 페이지(PAGE_SIZE행)만 보내고 나머지는 페이지 선택으로 이동
+PAGE_SIZE = 200
+n_pages = max(1, -(-len(filtered) // PAGE_SIZE))
+page = 1
+if n_pages > 1:
+    page = st.number_input(f"페이지 (1~{n_pages})", min_value=1, max_value=n_pages, value=1, step=1,
+                           key=f"page_{selected_month}")
+start = (page - 1) * PAGE_SIZE
+st.caption(f"총 {len(filtered):,}명 중 {start + 1:,}~{min(start + PAGE_SIZE, len(filtered)):,}번째")
+st.dataframe(filtered.iloc[start:start + PAGE_SIZE])
 
 # -----------------------
 # 📊 그래프 표시
 # -----------------------
 st.markdown("## 📈 월별 출생자 수")
-st.plotly_chart(birth_fig, use_container_width=True)
+st.plotly_chart(birth_fig, use_container_width=True, key="birth_bar")
 
 st.markdown("## 📈 월별 사망자 수")
-st.plotly_chart(death_fig, use_container_width=True)
+st.plotly_chart(death_fig, use_container_width=True, key="death_bar")
@@ -1,3 +1,4 @@
+import io
 import streamlit as st
 import pandas as pd
 import plotly.graph_objects as go
@@ -28,53 +29,146 @@ st.markdown("""
 """)
 
 # --------------------------------------------------------
-# ZIP 파일 업로더
+# ZIP → CSV 읽기 (업로드한 파일 내용이 같으면 다시 압축 해제·파싱하지 않음)
 # --------------------------------------------------------
-uploaded_zip = st.file_uploader("📦 ZIP 파일 업로드", type=["zip"])
+# 원본 DataFrame은 아래 합계 계산에서 읽기만 하므로 복사 없이 cache_resource로 보관
+# (용량이 크므로 가장 최근 업로드 하나만 유지)
+@st.cache_resource(max_entries=1, show_spinner="ZIP 파일에서 CSV를 읽는 중...")
+def load_subway(zip_bytes):
+    with zipfile.ZipFile(io.BytesIO(zip_bytes), 'r') as z:
+        csv_name = [f for f in z.namelist() if f.endswith(".csv")][0]
+
+        # 머리글만 먼저 읽어서 분석에 쓰는 열(호선명, 지하철역, 시간대별 승차/하차 인원)만 읽음
+        with z.open(csv_name) as csv_file:
+            header = pd.read_csv(csv_file, encoding="cp949", nrows=0).columns
+        time_columns = [col for col in header if "승차인원" in col or "하차인원" in col]
+        key_columns = [col for col in header if col in ("호선명", "지하철역")]
+        usecols = key_columns + time_columns
+
+        # 인원 수는 nullable 정수형(Int32)으로 바로 지정 → 형식 추론 생략, 메모리 절반
+        # (빈 칸이 있어도 읽을 수 있고, 빈 칸은 0명으로 처리)
+        # 호선명/지하철역은 반복되는 문자열이므로 category (groupby가 정수 코드로 동작)
+        dtype = {col: "Int32" for col in time_columns}
+        dtype.update({col: "category" for col in key_columns})
+        with z.open(csv_name) as csv_file:
+            df = pd.read_csv(csv_file, encoding="cp949", usecols=usecols, dtype=dtype)
+        df[time_columns] = df[time_columns].fillna(0)
+        return df
 
 # --------------------------------------------------------
-# ZIP 파일이 업로드된 경우 처리
+# (호선, 역)별 시간대 합계를 업로드마다 한 번만 계산
 # --------------------------------------------------------
-if uploaded_zip is not None:
+# 선택이 바뀔 때마다 전체 행을 필터링·합산하지 않고, 미리 합산한 배열에서 행 하나만 꺼냄
+# 캐시 키는 업로드 ID(file_id) → 리런마다 ZIP 전체 바이트를 해싱하지 않음
+@st.cache_data(show_spinner="시간대별 합계를 계산하는 중...")
+def build_station_sums(file_id, _zip_file):
+    df = load_subway(_zip_file.getvalue())
+
+    time_columns = [col for col in df.columns if "승차인원" in col or "하차인원" in col]
+    board_cols = [col for col in time_columns if "승차" in col]
+    alight_cols = [col for col in time_columns if "하차" in col]
+
+    # 시간대 라벨
+    time_labels = [
+        col.replace(" 승차인원", "").replace(" 하차인원", "")
+        for col in time_columns[0::2]
+    ]
 
-    # ZIP 내부 CSV 추출
-    with zipfile.ZipFile(uploaded_zip, 'r') as z:
-        file_list = z.namelist()
-        csv_name = [f for f in file_list if f.endswith(".csv")][0]
-        csv_file = z.open(csv_name)
+    # 승차 열 + 하차 열을 한 블록으로 한 번에 합산해서 NumPy 배열로 보관
+    # observed=True: 실제로 있는 (호선, 역) 조합만 (category 전체 조합을 만들지 않음)
+    grouped = df.groupby(["호선명", "지하철역"], sort=True, observed=True)
+    sums = grouped[board_cols + alight_cols].sum()
+    values = sums.to_numpy(dtype="int64")
+    board_sums = values[:, :len(board_cols)]
+    alight_sums = values[:, len(board_cols):]
 
-        df = pd.read_csv(csv_file, encoding="cp949")
+    # 호선 → {역: 합계 배열의 행 번호} (정렬된 인덱스 순서 = 선택 상자 순서)
+    stations_by_line = {}
+    for row, (line, station) in enumerate(sums.index):
+        stations_by_line.setdefault(line, {})[station] = row
 
-    st.success("ZIP 파일에서 CSV를 성공적으로 불러왔습니다!")
+    return time_labels, board_sums, alight_sums, stations_by_line
 
+# --------------------------------------------------------
+# 시간대별 승차·하차 그래프 (호선·역·인원이 같으면 다시 만들지 않음)
+# --------------------------------------------------------
+# 인자는 시간대 수(24개) 크기의 작은 값들이라 해싱 비용이 작음
+@st.cache_data(max_entries=64, show_spinner=False)
+def build_station_fig(line, station, time_labels, board, alight, extremes):
+    max_board_idx, min_board_idx, max_alight_idx, min_alight_idx = extremes
+
+    # trace 4개를 리스트로 만들어 Figure 생성자에 한 번에 전달 (add_trace 반복 검증 없음)
+    fig = go.Figure(data=[
+        # 승차 라인
+        go.Scatter(
+            x=time_labels, y=board,
+            mode="lines+markers",
+            name="승차 인원",
+            line=dict(width=3),
+            marker=dict(size=8)
+        ),
+        # 하차 라인
+        go.Scatter(
+            x=time_labels, y=alight,
+            mode="lines+markers",
+            name="하차 인원",
+            line=dict(width=3),
+            marker=dict(size=8)
+        ),
+        # 최대(빨강) / 최소(파랑) 표시: 승차·하차 지점을 trace 하나씩에 함께 담음
+        go.Scatter(
+            x=[time_labels[max_board_idx], time_labels[max_alight_idx]],
+            y=[board[max_board_idx], alight[max_alight_idx]],
+            text=["승차 최대", "하차 최대"],
+            mode="markers",
+            marker=dict(size=16, color="red"),
+            name="최대 (승차·하차)",
+            hovertemplate="%{text}: %{x} — %{y:,}명<extra></extra>"
+        ),
+        go.Scatter(
+            x=[time_labels[min_board_idx], time_labels[min_alight_idx]],
+            y=[board[min_board_idx], alight[min_alight_idx]],
+            text=["승차 최소", "하차 최소"],
+            mode="markers",
+            marker=dict(size=16, color="blue"),
+            name="최소 (승차·하차)",
+            hovertemplate="%{text}: %{x} — %{y:,}명<extra></extra>"
+        ),
+    ])
+
+    fig.update_layout(
+        title=f"📈 {line} {station} 시간대별 승차·하차 변화",
+        template="plotly_white",
+        xaxis_title="시간대",
+        yaxis_title="인원수",
+        height=600
+    )
+    return fig
+
+# --------------------------------------------------------
+# 호선/역 선택 + 요약 + 그래프 (st.fragment)
+# --------------------------------------------------------
+# 선택 상자를 바꾸면 페이지 전체가 아니라 이 함수만 다시 실행됨
+# (업로드 확인·캐시 조회 등 위쪽 코드는 건너뜀)
+@st.fragment
+def show_station(time_labels, board_sums, alight_sums, stations_by_line):
     # --------------------------------------------------------
     # 호선 / 역 선택 UI
     # --------------------------------------------------------
     st.subheader("🔎 분석 옵션")
 
-    line_options = sorted(df["호선명"].unique())
+    line_options = list(stations_by_line)
     selected_line = st.selectbox("호선 선택", line_options)
 
-    station_options = sorted(df[df["호선명"] == selected_line]["지하철역"].unique())
+    station_options = list(stations_by_line[selected_line])
     selected_station = st.selectbox("역 선택", station_options)
 
-    # 선택한 역 데이터 필터링
-    data = df[(df["호선명"] == selected_line) & (df["지하철역"] == selected_station)]
-
     # --------------------------------------------------------
-    # 시간대별 승차/하차 인원 계산
+    # 시간대별 승차/하차 인원 (미리 계산한 합계에서 조회)
     # --------------------------------------------------------
-    time_columns = [col for col in df.columns if "승차인원" in col or "하차인원" in col]
-
-    # 시간대 라벨
-    time_labels = [
-        col.replace(" 승차인원", "").replace(" 하차인원", "")
-        for col in time_columns[0::2]
-    ]
-
-    # 승차/하차 인원 계산
-    board = data[[col for col in time_columns if "승차" in col]].sum().values
-    alight = data[[col for col in time_columns if "하차" in col]].sum().values
+    row = stations_by_line[selected_line][selected_station]
+    board = board_sums[row]
+    alight = alight_sums[row]
 
     # 최대·최소 시간대 계산
     max_board_idx = board.argmax()
@@ -105,67 +199,28 @@ if uploaded_zip is not None:
     # --------------------------------------------------------
     st.subheader("📈 시간대별 승차·하차 그래프")
 
-    fig = go.Figure()
-
-    # 승차 라인
-    fig.add_trace(go.Scatter(
-        x=time_labels, y=board,
-        mode="lines+markers",
-        name="승차 인원",
-        line=dict(width=3),
-        marker=dict(size=8)
-    ))
-
-    # 하차 라인
-    fig.add_trace(go.Scatter(
-        x=time_labels, y=alight,
-        mode="lines+markers",
-        name="하차 인원",
-        line=dict(width=3),
-        marker=dict(size=8)
-    ))
-
-    # 승차 최대(빨강)
-    fig.add_trace(go.Scatter(
-        x=[time_labels[max_board_idx]], y=[board[max_board_idx]],
-        mode="markers",
-        marker=dict(size=16, color="red"),
-        name="승차 최대"
-    ))
-
-    # 승차 최소(파랑)
-    fig.add_trace(go.Scatter(
-        x=[time_labels[min_board_idx]], y=[board[min_board_idx]],
-        mode="markers",
-        marker=dict(size=16, color="blue"),
-        name="승차 최소"
-    ))
-
-    # 하차 최대(빨강)
-    fig.add_trace(go.Scatter(
-        x=[time_labels[max_alight_idx]], y=[alight[max_alight_idx]],
-        mode="markers",
-        marker=dict(size=16, color="red"),
-        name="하차 최대"
-    ))
-
-    # 하차 최소(파랑)
-    fig.add_trace(go.Scatter(
-        x=[time_labels[min_alight_idx]], y=[alight[min_alight_idx]],
-        mode="markers",
-        marker=dict(size=16, color="blue"),
-        name="하차 최소"
-    ))
+    # 그림은 역마다 한 번만 만들고, 이미 본 역으로 돌아오면 캐시된 그림을 사용
+    fig = build_station_fig(selected_line, selected_station, time_labels, board, alight,
+                            (max_board_idx, min_board_idx, max_alight_idx, min_alight_idx))
+    st.plotly_chart(fig, use_container_width=True)
 
-    fig.update_layout(
-        title=f"📈 {selected_line} {selected_station} 시간대별 승차·하차 변화",
-        template="plotly_white",
-        xaxis_title="시간대",
-        yaxis_title="인원수",
-        height=600
-    )
+# --------------------------------------------------------
+# ZIP 파일 업로더
+# --------------------------------------------------------
+uploaded_zip = st.file_uploader("📦 ZIP 파일 업로드", type=["zip"])
 
-    st.plotly_chart(fig, use_container_width=True)
+# --------------------------------------------------------
+# ZIP 파일이 업로드된 경우 처리
+# --------------------------------------------------------
+if uploaded_zip is not None:
+
+    # ZIP 내부 CSV 추출 + 합계 계산 (선택 상자를 바꿀 때는 캐시된 결과를 그대로 사용)
+    time_labels, board_sums, alight_sums, stations_by_line = build_station_sums(uploaded_zip.file_id, uploaded_zip)
+
+    st.success("ZIP 파일에서 CSV를 성공적으로 불러왔습니다!")
+
+    # 호선/역 선택 ~ 그래프는 fragment 안에서 그림 → 선택 상자를 바꿀 때는 이 부분만 다시 실행
+    show_station(time_labels, board_sums, alight_sums, stations_by_line)
 
 else:
     st.info("ZIP 파일을 업로드하면 분석이 시작됩니다.")